@@ -1,28 +1,45 @@
-from PyPDF3 import PdfFileReader, PdfFileWriter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
 import os
+import pymupdf
+import re
+import shutil
+import subprocess
 from typing import Callable
-from typing import Generator
 
 class OutputFile:
     def __init__(self, path: str, name: str, page_interval: tuple[int, int]):
         self.name = name
+        self.path = os.path.join(path, name)
         self.page_interval = page_interval
-        self.current_page = page_interval[0]
-        self.stream = open(os.path.join(path, name), 'wb')
+        self.stream = None
 
-    def pages(self) -> Generator[int, None, None]:
+    def pages(self) -> range:
         """
-        Generator that yields page numbers from start to end of the interval.
+        Returns the page numbers from start to end of the interval.
         """
-        while self.current_page <= self.page_interval[1]:
-            yield self.current_page
-            self.current_page += 1
+        return range(self.page_interval[0], self.page_interval[1] + 1)
 
     def __str__(self):
         return f'{self.name} ({self.page_interval[0]}-{self.page_interval[1]})'
     
-    def __del__(self):
-        self.stream.close()
+    def close(self) -> None:
+        """
+        Flushes and closes the output stream.
+        """
+        if self.stream is not None:
+            try:
+                self.stream.close()
+            finally:
+                self.stream = None
+
+    def __enter__(self) -> 'OutputFile':
+        # The file is only created when entering the context, after its name has been validated.
+        self.stream = open(self.path, 'wb')
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
 
 def list_pdf_files(directory_path: str) -> (list[str] | None):
     """
@@ -34,21 +51,57 @@ def list_pdf_files(directory_path: str) -> (list[str] | None):
     Returns:
         list[str] | None: A list of PDF filenames found in the directory, or None if the directory does not exist
     """
-    # Check if the directory exists
-    if not os.path.exists(directory_path):
+    # List all files and filter for .pdf extension. A missing directory is reported by scandir itself.
+    try:
+        with os.scandir(directory_path) as entries:
+            return [entry.name for entry in entries if entry.name[-4:].lower() == '.pdf' and entry.is_file()]
+    except FileNotFoundError:
         return None
-    
-    pdf_files = []
-    
-    # List all files and filter for .pdf extension
-    for file in os.listdir(directory_path):
-        if file.lower().endswith('.pdf'):
-            pdf_files.append(file)
-    
-    return pdf_files
+
+def find_existing_files(directory_path: str, names: list[str]) -> list[str]:
+    """
+    Finds which of the given file names already exist in a directory, scanning it only once.
+    Names only differing in case are reported when the file system ignores case, as on Windows and macOS.
+
+    Args:
+        directory_path (str): Path to the directory to search in
+        names (list[str]): File names to look for
+
+    Returns:
+        list[str]: The names of the existing files, as found in the directory, in the given order
+    """
+    with os.scandir(directory_path) as entries:
+        exact = {entry.name for entry in entries}
+    folded = {entry_name.casefold(): entry_name for entry_name in exact}
+
+    found = []
+    for name in names:
+        if name in exact:
+            found.append(name)
+
+        # A case variant is only the same file if the file system resolves the name to it.
+        elif name.casefold() in folded and os.path.exists(os.path.join(directory_path, name)):
+            found.append(folded[name.casefold()])
+    return found
+
+def is_same_file(path_a: str, path_b: str) -> bool:
+    """
+    Checks whether two paths refer to the same existing file.
+    """
+    try:
+        return os.path.samefile(path_a, path_b)
+    except OSError:
+        return False
 
 PROMPT_STR = '> '
 
+# Windows and Unix forbidden characters in file names
+FORBIDDEN_CHARS = '<>:"/\\|?*'
+FORBIDDEN_CHARS_RE = re.compile(f'[{re.escape(FORBIDDEN_CHARS)}]')
+
+# Any letter or number
+ALNUM_RE = re.compile(r'[^\W_]')
+
 def intro() -> str:
     """
     Prints the intro message and prompts the user for a path to the directory containing the PDF files they want to split.
@@ -93,11 +146,7 @@ def get_file_name(prompt: str, error_msg: str, allow_hidden: bool = False) -> st
     Returns:
         str: A valid file name.
     """
-    # Windows and Unix forbidden characters
-    forbidden_chars = '<>:"/\\|?*'
-    
-    done = False
-    while not done:
+    while True:
         name = input(prompt).strip()
         
         # Check for empty file names
@@ -105,8 +154,8 @@ def get_file_name(prompt: str, error_msg: str, allow_hidden: bool = False) -> st
             print("File name cannot be empty.")
 
         # Check for forbidden characters in file name   
-        elif any(char in forbidden_chars for char in name):
-            print(f"File name cannot contain any of these characters: {forbidden_chars}")
+        elif FORBIDDEN_CHARS_RE.search(name):
+            print(f"File name cannot contain any of these characters: {FORBIDDEN_CHARS}")
             
         # Check for hidden files
         elif not allow_hidden and name.startswith('.'):
@@ -117,14 +166,18 @@ def get_file_name(prompt: str, error_msg: str, allow_hidden: bool = False) -> st
             print("File name is too long. Maximum length is 255 characters.")
             
         # Check if name only contains spaces or dots
-        elif not any(c.isalnum() for c in name):
+        elif not ALNUM_RE.search(name):
             print("File name must contain at least one letter or number.")
 
         # Validation OK
         else:
-            done = True
-            
-        return name
+            return name
+
+def confirm(prompt: str) -> bool:
+    """
+    Prompts the user for a yes/no answer. Anything other than 'y' or 'yes' is a no.
+    """
+    return input(prompt).strip().lower() in ('y', 'yes')
 
 def select_file(files: list[str]) -> str:
     """
@@ -140,42 +193,162 @@ def select_file(files: list[str]) -> str:
 
     return files[selection - 1]
 
-def get_output_files(path: str, page_count: int) -> list[OutputFile]:
+def get_output_files(path: str, input_name: str, page_count: int) -> list[OutputFile]:
     """
     Returns a list of OutputFile objects for the selected PDF file, according to the user's input.
+    Output files can neither share a name nor overwrite the input file.
     """
+    input_path = os.path.join(path, input_name)
     targets = []
+    used_names = set()
     print('\nHow many output files do you want to create?')
     target_count = get_int(PROMPT_STR, 'Please enter a number between 1 and 100', 1, 100)
 
     for i in range(target_count):
         print('--------------------------------')
         print(f'Output file {i + 1}:')
-        name = get_file_name(f'{PROMPT_STR}File name: ', 'Invalid file name')
+
+        while True:
+            name = get_file_name(f'{PROMPT_STR}File name: ', 'Invalid file name')
+
+            # Output file names must be unique, ignoring case as on Windows and macOS file systems.
+            if f'{name}.pdf'.casefold() in used_names:
+                print('Another output file already has this name.')
+
+            # The input file is still read from disk by qpdf while output files are written.
+            elif is_same_file(os.path.join(path, f'{name}.pdf'), input_path):
+                print('Output file cannot overwrite the input file.')
+
+            else:
+                break
+        used_names.add(f'{name}.pdf'.casefold())
+
         start = get_int(f'{PROMPT_STR}First page: ', 'Invalid page number', 1, page_count)
         end = get_int(f'{PROMPT_STR}Last page: ', 'Invalid page number', start, page_count)
         targets.append(OutputFile(path, f'{name}.pdf', (start, end)))
 
     return targets
 
-def generate_output_files(reader: PdfFileReader, output_files: list[OutputFile], generated_callback: Callable[[OutputFile], None]) -> None:
+# Source document of the current worker process, opened once by _init_worker.
+_worker_source: pymupdf.Document | None = None
+
+def _init_worker(data: bytes) -> None:
     """
-    Generates output files from the input file.
+    Opens the source document in a worker process.
+    """
+    global _worker_source
+    _worker_source = pymupdf.open(stream=data, filetype='pdf')
+
+def _extract_interval(start: int, end: int) -> bytes:
     """
+    Copies a page interval of the worker's source document into a new document and returns it serialized.
+    """
+    # The writer is closed as soon as it is serialized, so only one output document is held per worker.
+    with pymupdf.open() as writer:
+        # Copy the page interval into the writer (0-based, inclusive).
+        writer.insert_pdf(_worker_source, from_page=start - 1, to_page=end - 1)
+
+        # Serialize the document in memory, so each output file gets a single write.
+        return writer.tobytes()
+
+def generate_output_files(data: bytes, output_files: list[OutputFile], generated_callback: Callable[[OutputFile], None]) -> None:
+    """
+    Generates output files from the contents of the input file.
+    Output files sharing the same page interval are built from a single copy of those pages,
+    and distinct intervals are built in parallel worker processes.
+    """
+    # Group the output files by page interval, so each interval is copied only once.
+    plan: dict[tuple[int, int], list[OutputFile]] = {}
     for output in output_files:
-        writer = PdfFileWriter()
+        plan.setdefault(output.page_interval, []).append(output)
+
+    if not plan:
+        return
+
+    workers = min(len(plan), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(data,)) as executor:
+        futures = {executor.submit(_extract_interval, start, end): outputs for (start, end), outputs in plan.items()}
+
+        # Write the output files as their intervals are ready.
+        # Completed futures are dropped right away, so their results can be freed once written.
+        for future in as_completed(futures):
+            result = future.result()
+            for output in futures.pop(future):
+                # Write the output file, making sure it reached the file before reporting it.
+                output.stream.write(result)
+                output.stream.flush()
+
+                # Call the callback function.
+                generated_callback(output)
 
-        # Add pages to the writer.
-        for page_number in output.pages():
-            writer.addPage(reader.getPage(page_number - 1))
+def _run_qpdf(source_path: str, output: OutputFile) -> tuple[OutputFile, str]:
+    """
+    Writes the page interval of an output file from the source file, using qpdf.
+
+    Returns:
+        tuple[OutputFile, str]: The output file, and the warnings reported by qpdf (empty if none)
+    """
+    start, end = output.page_interval
+
+    # Absolute paths can't be mistaken for qpdf options ('-') or argument files ('@').
+    result = subprocess.run(['qpdf', os.path.abspath(source_path), '--pages', '.', f'{start}-{end}', '--', os.path.abspath(output.path)], capture_output=True, text=True)
+
+    # qpdf exits with 3 when it succeeded with warnings.
+    if result.returncode not in (0, 3):
+        raise RuntimeError(f'qpdf could not generate {output.name} (exit status {result.returncode}): {result.stderr.strip()}')
+    return output, result.stderr.strip() if result.returncode == 3 else ''
+
+def generate_output_files_qpdf(source_path: str, output_files: list[OutputFile], generated_callback: Callable[[OutputFile], None]) -> None:
+    """
+    Generates output files from the input file with the qpdf command line tool.
+    Each output file is written directly by its own qpdf process, several of them running at once.
+    """
+    if not output_files:
+        return
 
-        # Write the output file.
-        writer.write(output.stream)
+    workers = min(len(output_files), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_run_qpdf, source_path, output) for output in output_files]
+        for future in as_completed(futures):
+            output, warnings = future.result()
+            if warnings:
+                print(f'qpdf warnings for {output.name}:\n{warnings}')
 
-        # Call the callback function.
-        generated_callback(output)
+            # Call the callback function.
+            generated_callback(output)
+
+# Environment variable selecting the backend used to generate output files.
+BACKEND_ENV_VAR = 'PDF_SPLITTER_BACKEND'
+
+# 'auto' uses qpdf when it is installed, and PyMuPDF otherwise.
+BACKENDS = ('auto', 'qpdf', 'pymupdf')
+
+def select_backend() -> (str | None):
+    """
+    Selects the backend used to generate output files, according to the PDF_SPLITTER_BACKEND environment variable.
+
+    Returns:
+        str | None: 'qpdf' or 'pymupdf', or None if the requested backend is invalid or not available
+    """
+    backend = os.environ.get(BACKEND_ENV_VAR, 'auto').strip().lower()
+    if backend not in BACKENDS:
+        print(f"Invalid {BACKEND_ENV_VAR} value '{backend}'. Valid values are: {', '.join(BACKENDS)}.")
+        return None
+
+    has_qpdf = shutil.which('qpdf') is not None
+    if backend == 'auto':
+        return 'qpdf' if has_qpdf else 'pymupdf'
+    if backend == 'qpdf' and not has_qpdf:
+        print('The qpdf backend was requested, but qpdf is not installed.')
+        return None
+    return backend
 
 def main() -> None:
+    # Select the backend before asking the user for anything.
+    backend = select_backend()
+    if backend is None:
+        return
+
     # Get path from user
     path = intro()
     
@@ -195,37 +368,53 @@ def main() -> None:
     # Select a file from the list. It will be used as the input file.
     selected_file = select_file(files)
 
-    # Open the input file.
+    # Read the whole input file into memory, so that parsing does not hit the disk.
     try:
-        input = open(os.path.join(path, selected_file), 'rb')
+        with open(os.path.join(path, selected_file), 'rb') as input:
+            data = input.read()
+        with pymupdf.open(stream=data, filetype='pdf') as source:
+            page_count = source.page_count
     except FileNotFoundError:
         print(f'File not found: {selected_file}')
         return
-    except IOError:
+    except (IOError, RuntimeError):
         print(f'Error reading file: {selected_file}')
         return
 
-    reader = PdfFileReader(input)
-    page_count = reader.getNumPages()
     print(f'Selected file: {selected_file} ({page_count} pages)')
 
     # Get the output files from the user.
-    output_files = get_output_files(path, page_count)
+    output_files = get_output_files(path, selected_file, page_count)
+
+    # Check for name collisions before any output file is created.
+    existing = find_existing_files(path, [output.name for output in output_files])
+    if existing:
+        print('\nThe following files already exist:')
+        for name in existing:
+            print(f'- {name}')
+        if not confirm(f'{PROMPT_STR}Overwrite them? (y/N): '):
+            print('No files were generated.')
+            return
 
-    # Generate the output files.
+    # Generate the output files with the selected backend.
+    # When using PyMuPDF, output files are all closed together once generation is done.
+    use_qpdf = backend == 'qpdf'
     print('\nGenerating output files...')
     try:
-        generate_output_files(reader, output_files, lambda file: print(f'Generated: {file}'))
-    except FileNotFoundError:
-        print(f'File not found: {selected_file}')
-    except IOError:
-        print(f'Error reading file: {selected_file}')
+        with ExitStack() as stack:
+            if not use_qpdf:
+                for output in output_files:
+                    stack.enter_context(output)
+
+            if use_qpdf:
+                generate_output_files_qpdf(os.path.join(path, selected_file), output_files, lambda file: print(f'Generated: {file}'))
+            else:
+                generate_output_files(data, output_files, lambda file: print(f'Generated: {file}'))
+    except IOError as e:
+        print(f'Error writing output files: {e}')
     except Exception as e:
         print(f'An unexpected error occurred: {e}')
 
-    # Close the input file and exit.
-    input.close()
-
 if __name__ == '__main__':
     try:
         main()
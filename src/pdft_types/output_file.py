@@ -1,22 +1,35 @@
-from typing import Generator
+import os
 
 class OutputFile:
     def __init__(self, path: str, name: str, page_interval: tuple[int, int]):
         self.name = name
+        self.path = os.path.join(path, name)
         self.page_interval = page_interval
-        self.current_page = page_interval[0]
-        self.stream = open(os.path.join(path, name), 'wb')
+        self.stream = None
 
-    def pages(self) -> Generator[int, None, None]:
+    def pages(self) -> range:
         """
-        Generator that yields page numbers from start to end of the interval.
+        Returns the page numbers from start to end of the interval.
         """
-        while self.current_page <= self.page_interval[1]:
-            yield self.current_page
-            self.current_page += 1
+        return range(self.page_interval[0], self.page_interval[1] + 1)
 
     def __str__(self):
         return f'{self.name} ({self.page_interval[0]}-{self.page_interval[1]})'
     
-    def __del__(self):
-        self.stream.close()
+    def close(self) -> None:
+        """
+        Flushes and closes the output stream.
+        """
+        if self.stream is not None:
+            try:
+                self.stream.close()
+            finally:
+                self.stream = None
+
+    def __enter__(self) -> 'OutputFile':
+        # The file is only created when entering the context, after its name has been validated.
+        self.stream = open(self.path, 'wb')
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -10,15 +10,9 @@ def list_pdf_files(directory_path: str) -> (list[str] | None):
     Returns:
         list[str] | None: A list of PDF filenames found in the directory, or None if the directory does not exist
     """
-    # Check if the directory exists
-    if not os.path.exists(directory_path):
+    # List all files and filter for .pdf extension. A missing directory is reported by scandir itself.
+    try:
+        with os.scandir(directory_path) as entries:
+            return [entry.name for entry in entries if entry.name[-4:].lower() == '.pdf' and entry.is_file()]
+    except FileNotFoundError:
         return None
-    
-    pdf_files = []
-    
-    # List all files and filter for .pdf extension
-    for file in os.listdir(directory_path):
-        if file.lower().endswith('.pdf'):
-            pdf_files.append(file)
-    
-    return pdf_files